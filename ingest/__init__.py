@@ -6,7 +6,7 @@ from DailyMed's bulk data resources.
 
 Key components:
 - DailyMedDownloader: Downloads SPL bulk files from DailyMed
-- VersionTracker: Tracks file versions and changes using MD5 hashes
+- VersionTracker: Tracks file versions and changes using BLAKE3 content hashes
 - IngestionConfig: Configuration for the ingestion process
 """
 
@@ -1,68 +1,204 @@
-import hashlib
 import logging
+import os
 import re
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from typing import List, Optional
 from urllib.parse import urljoin, urlparse
 
-import requests
-from lxml import html
+import blake3
+import httpx
+from lxml import etree
 from tqdm import tqdm
 
 from .models import DownloadMetadata, IngestionConfig, SPLBulkFile
+from .tracker import VersionTracker
 
 
 logger = logging.getLogger(__name__)
 
+# The discovery page is large HTML that compresses well; the bulk zips are not
+# worth recompressing, so only discovery advertises brotli
+DISCOVERY_HEADERS = {'Accept': 'text/html', 'Accept-Encoding': 'br, gzip, deflate'}
+# Transient gateway errors worth retrying with backoff
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+# Algorithm used for local change detection (DailyMed publishes no checksums to match)
+HASH_ALGORITHM = 'blake3'
+
+# SPL release files from DailyMed (human Rx/OTC, homeopathic, animal, remainder, general)
+_SPL_FILENAME_RE = re.compile(
+    r'dm_spl_release_(?:human_rx|human_otc|homeopathic|animal|remainder)|spl_release',
+    re.IGNORECASE
+)
+
+
+class _ZipLinkCollector:
+    """lxml parser target collecting zip link hrefs without building a tree
+    
+    Mirrors the ``//h3[contains(text(), "Full Releases")]/..`` lookup: the section is
+    the parent of an h3 whose first text node contains the heading, and all zip links
+    inside that parent count, including those before the heading.
+    """
+    
+    def __init__(self):
+        self.links: List[str] = []
+        self.full_release_links: List[str] = []
+        self.section_found = False
+        # Start order and number of links seen when each open element started
+        self._open: List[tuple] = []
+        self._order = 0
+        # Depth of the open h3 and its first direct text node, once text arrives
+        self._heading_depth: Optional[int] = None
+        self._heading_text: Optional[List[str]] = None
+        self._heading_text_done = False
+        # Start order, link offset and depth of the earliest matching section element
+        self._section: Optional[tuple] = None
+        self._section_end: Optional[int] = None
+    
+    def _end_heading_text(self):
+        # Any tag ends the current text node, so later text is not the first one
+        if self._heading_text:
+            self._heading_text_done = True
+    
+    def start(self, tag, attrib):
+        self._end_heading_text()
+        self._open.append((self._order, len(self.links)))
+        self._order += 1
+        if tag == 'h3' and self._heading_depth is None:
+            self._heading_depth = len(self._open)
+            self._heading_text = []
+            self._heading_text_done = False
+        elif tag == 'a':
+            href = attrib.get('href', '')
+            if '.zip' in href:
+                self.links.append(href)
+    
+    def end(self, tag):
+        self._end_heading_text()
+        depth = len(self._open)
+        if depth == self._heading_depth:
+            if depth > 1 and 'Full Releases' in ''.join(self._heading_text):
+                order, offset = self._open[-2]
+                # XPath returns parents in document order, so an enclosing match wins
+                if self._section is None or order < self._section[0]:
+                    self._section = (order, offset, depth - 1)
+                    self._section_end = None
+            self._heading_depth = None
+            self._heading_text = None
+        elif (self._section is not None and self._section_end is None and
+                depth == self._section[2]):
+            self._section_end = len(self.links)
+        self._open.pop()
+    
+    def data(self, data):
+        if (self._heading_text is not None and not self._heading_text_done and
+                len(self._open) == self._heading_depth):
+            self._heading_text.append(data)
+    
+    def close(self):
+        if self._section is not None:
+            self.section_found = True
+            self.full_release_links = self.links[self._section[1]:self._section_end]
+        return self
+
 
 class DailyMedDownloader:
     """Downloads SPL bulk files from DailyMed"""
     
-    def __init__(self, config: Optional[IngestionConfig] = None):
+    def __init__(self, config: Optional[IngestionConfig] = None,
+                 tracker: Optional[VersionTracker] = None):
         self.config = config or IngestionConfig()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': self.config.user_agent
-        })
+        # Optional tracker used to revalidate existing files with conditional GETs
+        self.tracker = tracker
+        # A single thread-safe HTTP/2 client multiplexes the HEAD and GET requests
+        # of all worker threads over shared connections
+        self.client = self._create_client()
         
         # Ensure download directory exists
         self.config.download_dir.mkdir(parents=True, exist_ok=True)
     
+    def _create_client(self) -> httpx.Client:
+        """Create an HTTP/2 client configured for DailyMed"""
+        limits = httpx.Limits(
+            max_connections=self.config.max_concurrent_downloads,
+            max_keepalive_connections=self.config.max_concurrent_downloads
+        )
+        # The transport retries failed connection attempts; gateway errors are
+        # retried with backoff in _send and interrupted transfers in download_file
+        transport = httpx.HTTPTransport(
+            http2=True,
+            limits=limits,
+            retries=self.config.retry_attempts
+        )
+        return httpx.Client(
+            transport=transport,
+            timeout=self.config.timeout,
+            headers={'User-Agent': self.config.user_agent},
+            follow_redirects=True
+        )
+    
+    def _send(self, method: str, url: str, headers: Optional[dict] = None,
+              stream: bool = False) -> httpx.Response:
+        """Send a request, retrying transient gateway errors with exponential backoff"""
+        request = self.client.build_request(method, url, headers=headers)
+        for attempt in range(self.config.retry_attempts + 1):
+            response = self.client.send(request, stream=stream)
+            if (response.status_code not in RETRY_STATUS_CODES or
+                    attempt == self.config.retry_attempts):
+                return response
+            response.close()
+            time.sleep(self.config.retry_delay * (2 ** attempt))
+    
+    def close(self) -> None:
+        """Close the underlying HTTP client and its connections"""
+        self.client.close()
+    
+    def __enter__(self) -> "DailyMedDownloader":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
     def discover_bulk_files(self) -> List[SPLBulkFile]:
         """Discover available SPL bulk files from DailyMed"""
         logger.info(f"Discovering bulk files from {self.config.base_url}")
         
+        # Stream the page through a parser target that only collects zip links
+        collector = _ZipLinkCollector()
+        parser = etree.HTMLParser(target=collector)
         try:
-            response = self.session.get(
-                self.config.base_url,
-                timeout=self.config.timeout
-            )
-            response.raise_for_status()
-        except requests.RequestException as e:
+            response = self._send('GET', self.config.base_url,
+                                  headers=DISCOVERY_HEADERS, stream=True)
+            try:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(chunk_size=self.config.chunk_size):
+                    parser.feed(chunk)
+            finally:
+                response.close()
+            parser.close()
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch bulk files page: {e}")
             raise
         
-        # Parse HTML to find bulk file links
-        tree = html.fromstring(response.content)
-        bulk_files = []
+        # Both HTTP and FTP links exist for each file, so deduplicate by filename as we go
+        seen_filenames = set()
+        unique_bulk_files = []
         
         # Look for links in the "Full Releases" section specifically
-        # Find the Full Releases section heading
-        full_releases_section = tree.xpath('//h3[contains(text(), "Full Releases")]/..')
+        zip_hrefs = collector.full_release_links
         
-        if not full_releases_section:
+        if not collector.section_found:
             # Fallback: look for any .zip links with SPL-related keywords
-            zip_links = tree.xpath('//a[@href[contains(., ".zip")]]')
+            zip_hrefs = collector.links
             logger.info("Full Releases section not found, using fallback link discovery")
         else:
-            # Look for .zip links within the Full Releases section
-            zip_links = full_releases_section[0].xpath('.//a[@href[contains(., ".zip")]]')
-            logger.info(f"Found Full Releases section with {len(zip_links)} zip links")
+            logger.info(f"Found Full Releases section with {len(zip_hrefs)} zip links")
         
-        for link in zip_links:
-            href = link.get('href')
+        for href in zip_hrefs:
             if not href:
                 continue
                 
@@ -75,17 +211,14 @@ class DailyMedDownloader:
                 url = href
             
             filename = Path(urlparse(url).path).name
+            if filename in seen_filenames:
+                continue
             
             # Filter for SPL release files - look for the specific patterns from DailyMed
-            if any(keyword in filename.lower() for keyword in [
-                'dm_spl_release_human_rx',     # Human prescription
-                'dm_spl_release_human_otc',    # Human OTC
-                'dm_spl_release_homeopathic',  # Homeopathic
-                'dm_spl_release_animal',       # Animal
-                'dm_spl_release_remainder',    # Remainder
-                'spl_release'                  # General SPL releases
-            ]):
-                bulk_files.append(SPLBulkFile(
+            if _SPL_FILENAME_RE.search(filename):
+                seen_filenames.add(filename)
+                # Inputs are plain strings we built above, so skip pydantic validation
+                unique_bulk_files.append(SPLBulkFile.model_construct(
                     filename=filename,
                     url=url
                 ))
@@ -93,29 +226,18 @@ class DailyMedDownloader:
             else:
                 logger.debug(f"Skipped file (not SPL release): {filename}")
         
-        # Remove duplicates by filename (since both HTTP and FTP links exist for each file)
-        seen_filenames = set()
-        unique_bulk_files = []
-        for bulk_file in bulk_files:
-            if bulk_file.filename not in seen_filenames:
-                seen_filenames.add(bulk_file.filename)
-                unique_bulk_files.append(bulk_file)
-                
-        logger.info(f"Discovered {len(unique_bulk_files)} unique bulk files (filtered from {len(bulk_files)} total links)")
+        logger.info(f"Discovered {len(unique_bulk_files)} unique bulk files (filtered from {len(zip_hrefs)} total links)")
         return unique_bulk_files
     
     def get_file_metadata(self, url: str) -> tuple[Optional[datetime], Optional[int]]:
         """Get file metadata without downloading"""
         try:
-            response = self.session.head(url, timeout=self.config.timeout)
+            response = self._send('HEAD', url)
             response.raise_for_status()
             
             last_modified = None
             if 'Last-Modified' in response.headers:
-                last_modified = datetime.strptime(
-                    response.headers['Last-Modified'],
-                    '%a, %d %b %Y %H:%M:%S %Z'
-                )
+                last_modified = self._parse_http_date(response.headers['Last-Modified'])
             
             size = None
             if 'Content-Length' in response.headers:
@@ -123,87 +245,190 @@ class DailyMedDownloader:
             
             return last_modified, size
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.warning(f"Failed to get metadata for {url}: {e}")
             return None, None
     
-    def calculate_md5(self, file_path: Path) -> str:
-        """Calculate MD5 hash of a file"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+    @staticmethod
+    def _parse_http_date(value: str) -> Optional[datetime]:
+        """Parse an RFC 7231 HTTP date into a timezone-aware UTC datetime"""
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed HTTP date: {value!r}")
+            return None
+        # Dates with a -0000 offset come back naive but are still UTC
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+    
+    def _fetch_metadata(self, bulk_file: SPLBulkFile) -> None:
+        """Populate last_modified and size of a bulk file from a HEAD request"""
+        bulk_file.last_modified, bulk_file.size = self.get_file_metadata(bulk_file.url)
+    
+    def calculate_hash(self, file_path: Path) -> str:
+        """Calculate the BLAKE3 hash of a file using a memory map and multiple threads"""
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        hasher.update_mmap(file_path)
+        return hasher.hexdigest()
+    
+    def _get_known_hash(self, bulk_file: SPLBulkFile, local_path: Path) -> Optional[str]:
+        """Return the tracked hash of a local file if the server copy is unchanged
+        
+        The HEAD size and Last-Modified of the remote file are compared with the
+        local file so a multi-GB file is only rehashed when it may have changed.
+        """
+        if not self.tracker:
+            return None
+        
+        stored_metadata = self.tracker.get_file_metadata(bulk_file.filename)
+        if not stored_metadata:
+            return None
+        stored_hash = stored_metadata.get('content_hash') or {}
+        if stored_hash.get('algo') != HASH_ALGORITHM:
+            return None
+        
+        last_modified, size = bulk_file.last_modified, bulk_file.size
+        if last_modified is None or size is None:
+            last_modified, size = self.get_file_metadata(bulk_file.url)
+        if last_modified is None or size is None:
+            return None
+        
+        stat = local_path.stat()
+        if (size != stat.st_size or stored_metadata.get('file_size') != stat.st_size or
+                last_modified > datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)):
+            return None
+        
+        return stored_hash.get('digest')
     
-    def download_file(self, bulk_file: SPLBulkFile, force: bool = False) -> Optional[DownloadMetadata]:
-        """Download a single bulk file with progress tracking"""
+    def download_file(self, bulk_file: SPLBulkFile, force: bool = False,
+                      position: Optional[int] = None) -> Optional[DownloadMetadata]:
+        """Download a single bulk file with progress tracking
+        
+        With force=True an existing file is revalidated against DailyMed using the
+        ETag/Last-Modified validators stored in the tracker, and only re-downloaded
+        if the server reports a change.
+        """
         local_path = self.config.download_dir / bulk_file.filename
         
         # Check if file already exists and skip if not forced
         if local_path.exists() and not force:
             logger.info(f"File {bulk_file.filename} already exists, skipping")
-            # Calculate hash of existing file
-            md5_hash = self.calculate_md5(local_path)
+            content_hash = self._get_known_hash(bulk_file, local_path)
+            if content_hash is None:
+                # Calculate hash of existing file
+                content_hash = self.calculate_hash(local_path)
+            stat = local_path.stat()
             return DownloadMetadata(
                 filename=bulk_file.filename,
                 url=bulk_file.url,
-                download_time=datetime.fromtimestamp(local_path.stat().st_mtime),
-                file_size=local_path.stat().st_size,
-                md5_hash=md5_hash,
+                download_time=datetime.fromtimestamp(stat.st_mtime),
+                file_size=stat.st_size,
+                content_hash=content_hash,
+                hash_algorithm=HASH_ALGORITHM,
                 local_path=local_path
             )
         
+        # Send conditional request headers when we hold a previously tracked copy
+        stored_metadata = None
+        headers = {}
+        if self.tracker and local_path.exists():
+            stored_metadata = self.tracker.get_file_metadata(bulk_file.filename)
+            # A local copy that no longer matches the tracked size cannot be revalidated
+            if stored_metadata and stored_metadata.get('file_size') != local_path.stat().st_size:
+                stored_metadata = None
+            if stored_metadata:
+                if stored_metadata.get('etag'):
+                    headers['If-None-Match'] = stored_metadata['etag']
+                if stored_metadata.get('last_modified_http'):
+                    headers['If-Modified-Since'] = stored_metadata['last_modified_http']
+        
+        part_path = local_path.with_name(local_path.name + '.part')
         logger.info(f"Downloading {bulk_file.filename} from {bulk_file.url}")
         
-        for attempt in range(self.config.retry_attempts):
+        # A transfer that fails mid-stream is restarted with exponential backoff
+        for attempt in range(self.config.retry_attempts + 1):
             try:
-                response = self.session.get(
-                    bulk_file.url, 
-                    stream=True,
-                    timeout=self.config.timeout
-                )
-                response.raise_for_status()
-                
-                # Get file size for progress bar
-                total_size = int(response.headers.get('Content-Length', 0))
-                
-                # Download with progress bar
-                with open(local_path, 'wb') as f:
-                    with tqdm(
-                        total=total_size,
-                        unit='iB',
-                        unit_scale=True,
-                        desc=bulk_file.filename
-                    ) as pbar:
-                        for chunk in response.iter_content(chunk_size=self.config.chunk_size):
-                            if chunk:
-                                f.write(chunk)
-                                pbar.update(len(chunk))
-                
-                # Calculate hash
-                md5_hash = self.calculate_md5(local_path)
-                
-                metadata = DownloadMetadata(
+                return self._fetch_to_file(bulk_file, local_path, part_path,
+                                           headers, stored_metadata, position)
+            except httpx.TransportError as e:
+                if attempt == self.config.retry_attempts:
+                    logger.error(f"Failed to download {bulk_file.filename}: {e}")
+                    return None
+                logger.warning(f"Transfer of {bulk_file.filename} failed ({e}), retrying")
+                time.sleep(self.config.retry_delay * (2 ** attempt))
+            except httpx.HTTPError as e:
+                logger.error(f"Failed to download {bulk_file.filename}: {e}")
+                return None
+            finally:
+                part_path.unlink(missing_ok=True)
+    
+    def _fetch_to_file(self, bulk_file: SPLBulkFile, local_path: Path, part_path: Path,
+                       headers: dict, stored_metadata: Optional[dict],
+                       position: Optional[int]) -> DownloadMetadata:
+        """Issue one GET for a bulk file and stream its body into place"""
+        response = self._send('GET', bulk_file.url, headers=headers, stream=True)
+        try:
+            if response.status_code == 304 and stored_metadata:
+                logger.info(f"File {bulk_file.filename} not modified on server, skipping")
+                return DownloadMetadata(
                     filename=bulk_file.filename,
                     url=bulk_file.url,
-                    download_time=datetime.now(),
-                    file_size=local_path.stat().st_size,
-                    md5_hash=md5_hash,
-                    local_path=local_path
+                    download_time=stored_metadata['download_time'],
+                    file_size=stored_metadata['file_size'],
+                    content_hash=stored_metadata['content_hash']['digest'],
+                    hash_algorithm=stored_metadata['content_hash']['algo'],
+                    local_path=local_path,
+                    etag=stored_metadata.get('etag'),
+                    last_modified_http=stored_metadata.get('last_modified_http')
                 )
-                
-                logger.info(f"Successfully downloaded {bulk_file.filename} ({metadata.file_size:,} bytes)")
-                return metadata
-                
-            except requests.RequestException as e:
-                logger.warning(f"Attempt {attempt + 1} failed for {bulk_file.filename}: {e}")
-                if attempt < self.config.retry_attempts - 1:
-                    time.sleep(self.config.retry_delay * (2 ** attempt))  # Exponential backoff
-                else:
-                    logger.error(f"Failed to download {bulk_file.filename} after {self.config.retry_attempts} attempts")
-                    return None
-        
-        return None
+            
+            response.raise_for_status()
+            
+            # Get file size for progress bar
+            total_size = int(response.headers.get('Content-Length', 0))
+            
+            # Download with progress bar, hashing the bytes as they arrive; the body goes
+            # to a temporary file so a failed transfer never truncates the existing copy
+            hasher = blake3.blake3()
+            with open(part_path, 'wb') as f:
+                # Throttle redraws to ~2/s at 1 MiB granularity; headless runs skip tqdm
+                with tqdm(
+                    total=total_size,
+                    unit='iB',
+                    unit_scale=True,
+                    desc=bulk_file.filename,
+                    position=position,
+                    mininterval=0.5,
+                    miniters=1 << 20,
+                    smoothing=0.1,
+                    disable=not self.config.show_progress
+                ) as pbar:
+                    for chunk in response.iter_bytes(chunk_size=self.config.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            pbar.update(len(chunk))
+            
+            file_size = part_path.stat().st_size
+            os.replace(part_path, local_path)
+            
+            metadata = DownloadMetadata(
+                filename=bulk_file.filename,
+                url=bulk_file.url,
+                download_time=datetime.now(),
+                file_size=file_size,
+                content_hash=hasher.hexdigest(),
+                hash_algorithm=HASH_ALGORITHM,
+                local_path=local_path,
+                etag=response.headers.get('ETag'),
+                last_modified_http=response.headers.get('Last-Modified')
+            )
+            
+            logger.info(f"Successfully downloaded {bulk_file.filename} ({metadata.file_size:,} bytes)")
+            return metadata
+        finally:
+            response.close()
     
     def download_all(self, force: bool = False) -> List[DownloadMetadata]:
         """Discover and download all available bulk files"""
@@ -213,19 +438,26 @@ class DailyMedDownloader:
             logger.warning("No bulk files found to download")
             return []
         
-        # Update file metadata
-        logger.info("Fetching file metadata...")
-        for bulk_file in bulk_files:
-            last_modified, size = self.get_file_metadata(bulk_file.url)
-            bulk_file.last_modified = last_modified
-            bulk_file.size = size
-        
-        # Download files
         downloaded = []
-        for bulk_file in bulk_files:
-            metadata = self.download_file(bulk_file, force=force)
-            if metadata:
-                downloaded.append(metadata)
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrent_downloads) as executor:
+            # Update file metadata
+            logger.info("Fetching file metadata...")
+            list(executor.map(self._fetch_metadata, bulk_files))
+            
+            # Download files
+            futures = {
+                executor.submit(self.download_file, bulk_file, force, position): bulk_file
+                for position, bulk_file in enumerate(bulk_files)
+            }
+            for future in as_completed(futures):
+                bulk_file = futures[future]
+                try:
+                    metadata = future.result()
+                except Exception as e:
+                    logger.error(f"Unexpected error downloading {bulk_file.filename}: {e}")
+                    continue
+                if metadata:
+                    downloaded.append(metadata)
         
         logger.info(f"Downloaded {len(downloaded)} out of {len(bulk_files)} files")
         return downloaded
\ No newline at end of file
@@ -10,8 +10,12 @@ class DownloadMetadata(BaseModel):
     url: str
     download_time: datetime
     file_size: int
-    md5_hash: str
+    content_hash: str
+    hash_algorithm: str = "blake3"
     local_path: Path
+    # Raw HTTP validators used for conditional requests
+    etag: Optional[str] = None
+    last_modified_http: Optional[str] = None
 
 
 class SPLBulkFile(BaseModel):
@@ -27,8 +31,9 @@ class IngestionConfig(BaseModel):
     base_url: str = "https://dailymed.nlm.nih.gov/dailymed/spl-resources-all-drug-labels.cfm"
     download_dir: Path = Field(default_factory=lambda: Path("data/raw"))
     max_concurrent_downloads: int = 3
-    chunk_size: int = 8192
+    chunk_size: int = 1 << 20
     user_agent: str = "SPL-Ingestion-Pipeline/1.0"
     timeout: int = 300
     retry_attempts: int = 3
-    retry_delay: float = 1.0
\ No newline at end of file
+    retry_delay: float = 1.0
+    show_progress: bool = True
\ No newline at end of file
@@ -134,7 +134,7 @@ def test_single_download():
         if metadata:
             print(f"[SUCCESS] Downloaded: {metadata.filename}")
             print(f"   Size: {metadata.file_size:,} bytes")
-            print(f"   MD5: {metadata.md5_hash}")
+            print(f"   Hash ({metadata.hash_algorithm}): {metadata.content_hash}")
             print(f"   Path: {metadata.local_path}")
             
             # Record in tracker
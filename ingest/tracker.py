@@ -1,8 +1,10 @@
-import json
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
+
+import orjson
 
 from .models import DownloadMetadata
 
@@ -13,61 +15,102 @@ logger = logging.getLogger(__name__)
 class VersionTracker:
     """Tracks versions and changes of downloaded SPL files"""
     
-    def __init__(self, metadata_file: Path = None):
+    def __init__(self, metadata_file: Path = None, autosave: bool = True):
         self.metadata_file = metadata_file or Path("data/metadata/downloads.json")
         self.metadata_file.parent.mkdir(parents=True, exist_ok=True)
+        # With autosave disabled, changes are only written by flush() or on context exit
+        self.autosave = autosave
+        self._dirty = False
         self._metadata: Dict[str, Dict] = {}
+        # Running totals so get_stats does not scan every entry
+        self._total_size = 0
+        self._latest_download: Optional[datetime] = None
         self.load_metadata()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+    
+    def flush(self):
+        """Save metadata if there are unsaved changes"""
+        if self._dirty:
+            self.save_metadata()
+    
     def load_metadata(self):
         """Load existing metadata from file"""
         if self.metadata_file.exists():
             try:
-                with open(self.metadata_file, 'r') as f:
-                    data = json.load(f)
-                    # Convert datetime strings back to datetime objects
-                    for filename, metadata in data.items():
-                        if 'download_time' in metadata:
-                            metadata['download_time'] = datetime.fromisoformat(metadata['download_time'])
-                    self._metadata = data
+                data = orjson.loads(self.metadata_file.read_bytes())
+                # Convert datetime strings back to datetime objects
+                for filename, metadata in data.items():
+                    if 'download_time' in metadata:
+                        metadata['download_time'] = datetime.fromisoformat(metadata['download_time'])
+                    # Entries written before hashes were tagged with their algorithm
+                    if 'md5_hash' in metadata:
+                        metadata['content_hash'] = {'algo': 'md5', 'digest': metadata.pop('md5_hash')}
+                self._metadata = data
                 logger.info(f"Loaded metadata for {len(self._metadata)} files")
-            except (json.JSONDecodeError, KeyError) as e:
+            except (orjson.JSONDecodeError, KeyError) as e:
                 logger.warning(f"Failed to load metadata file: {e}")
                 self._metadata = {}
         else:
             logger.info("No existing metadata file found, starting fresh")
+        self._recompute_stats()
+    
+    def _recompute_stats(self):
+        """Recompute the cached size and latest download time from all entries"""
+        self._total_size = sum(meta.get('file_size', 0) for meta in self._metadata.values())
+        self._latest_download = max(
+            (meta['download_time'] for meta in self._metadata.values() if meta.get('download_time')),
+            default=None
+        )
     
     def save_metadata(self):
         """Save metadata to file"""
         try:
-            # Convert datetime objects to strings for JSON serialization
-            serializable_data = {}
-            for filename, metadata in self._metadata.items():
-                serializable_metadata = metadata.copy()
-                if 'download_time' in serializable_metadata and isinstance(serializable_metadata['download_time'], datetime):
-                    serializable_metadata['download_time'] = serializable_metadata['download_time'].isoformat()
-                if 'local_path' in serializable_metadata and isinstance(serializable_metadata['local_path'], Path):
-                    serializable_metadata['local_path'] = str(serializable_metadata['local_path'])
-                serializable_data[filename] = serializable_metadata
+            # orjson serializes datetimes as ISO-8601; paths fall back to str
+            serialized = orjson.dumps(self._metadata, default=str, option=orjson.OPT_INDENT_2)
             
-            with open(self.metadata_file, 'w') as f:
-                json.dump(serializable_data, f, indent=2, default=str)
+            # Write to a temporary file and swap it in so a crash never leaves a truncated file
+            tmp_file = self.metadata_file.with_suffix('.json.tmp')
+            tmp_file.write_bytes(serialized)
+            os.replace(tmp_file, self.metadata_file)
+            self._dirty = False
             logger.info(f"Saved metadata to {self.metadata_file}")
         except Exception as e:
             logger.error(f"Failed to save metadata: {e}")
     
     def record_download(self, metadata: DownloadMetadata):
         """Record a successful download"""
+        previous = self._metadata.get(metadata.filename)
         self._metadata[metadata.filename] = {
             'filename': metadata.filename,
             'url': metadata.url,
             'download_time': metadata.download_time,
             'file_size': metadata.file_size,
-            'md5_hash': metadata.md5_hash,
+            'content_hash': {'algo': metadata.hash_algorithm, 'digest': metadata.content_hash},
             'local_path': str(metadata.local_path),
+            'etag': metadata.etag,
+            'last_modified_http': metadata.last_modified_http,
             'version': self.get_next_version(metadata.filename)
         }
-        self.save_metadata()
+        
+        if previous and previous.get('download_time') == self._latest_download:
+            # The entry holding the latest time was replaced, so totals must be rebuilt
+            self._recompute_stats()
+        else:
+            if previous:
+                self._total_size -= previous.get('file_size', 0)
+            self._total_size += metadata.file_size
+            if self._latest_download is None or metadata.download_time > self._latest_download:
+                self._latest_download = metadata.download_time
+        
+        self._dirty = True
+        if self.autosave:
+            self.save_metadata()
         logger.info(f"Recorded download for {metadata.filename}")
     
     def get_next_version(self, filename: str) -> int:
@@ -84,8 +127,10 @@ class VersionTracker:
         stored_metadata = self._metadata[metadata.filename]
         
         # Compare file size and hash
+        stored_hash = stored_metadata.get('content_hash') or {}
         if (stored_metadata.get('file_size') != metadata.file_size or
-            stored_metadata.get('md5_hash') != metadata.md5_hash):
+            stored_hash.get('algo') != metadata.hash_algorithm or
+            stored_hash.get('digest') != metadata.content_hash):
             return True
         
         return False
@@ -100,10 +145,15 @@ class VersionTracker:
     
     def cleanup_missing_files(self):
         """Remove metadata for files that no longer exist locally"""
+        # List each download directory once instead of stat-ing every tracked file
+        present_files: Dict[str, Set[str]] = {}
         to_remove = []
         for filename, metadata in self._metadata.items():
             local_path = Path(metadata.get('local_path', ''))
-            if not local_path.exists():
+            directory = str(local_path.parent)
+            if directory not in present_files:
+                present_files[directory] = self._list_files(directory)
+            if not local_path.name or local_path.name not in present_files[directory]:
                 to_remove.append(filename)
                 logger.info(f"Marking {filename} for removal - file no longer exists")
         
@@ -111,9 +161,21 @@ class VersionTracker:
             del self._metadata[filename]
         
         if to_remove:
-            self.save_metadata()
+            self._recompute_stats()
+            self._dirty = True
+            if self.autosave:
+                self.save_metadata()
             logger.info(f"Cleaned up metadata for {len(to_remove)} missing files")
     
+    @staticmethod
+    def _list_files(directory: str) -> Set[str]:
+        """Return the names of the regular files in a directory"""
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name for entry in entries if entry.is_file()}
+        except (FileNotFoundError, NotADirectoryError):
+            return set()
+    
     def get_download_history(self, filename: str) -> List[Dict]:
         """Get download history for a specific file (if versioning is implemented)"""
         # For now, just return the current metadata
@@ -123,25 +185,8 @@ class VersionTracker:
     
     def get_stats(self) -> Dict:
         """Get statistics about tracked downloads"""
-        if not self._metadata:
-            return {
-                'total_files': 0,
-                'total_size': 0,
-                'latest_download': None
-            }
-        
-        total_size = sum(meta.get('file_size', 0) for meta in self._metadata.values())
-        
-        latest_download = None
-        for meta in self._metadata.values():
-            download_time = meta.get('download_time')
-            if isinstance(download_time, str):
-                download_time = datetime.fromisoformat(download_time)
-            if download_time and (not latest_download or download_time > latest_download):
-                latest_download = download_time
-        
         return {
             'total_files': len(self._metadata),
-            'total_size': total_size,
-            'latest_download': latest_download
+            'total_size': self._total_size,
+            'latest_download': self._latest_download
         }
\ No newline at end of file
@@ -3,9 +3,75 @@ Date normalization utilities for SPL documents.
 Converts various date formats to ISO-8601 standard format.
 """
 
+import calendar
+import functools
+import math
 import re
-from datetime import datetime
-from typing import Optional, Union
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+# Widths strptime accepts for each directive used in the SPL formats
+_DIRECTIVE_WIDTHS = {
+    'Y': (4, 4), 'm': (1, 2), 'd': (1, 2),
+    'H': (1, 2), 'M': (1, 2), 'S': (1, 2), 'f': (1, 6),
+    'b': (3, 3), 'B': (3, 9),
+}
+
+
+def _format_length_range(date_format: str) -> Tuple[int, float]:
+    """Return the shortest and longest strings strptime can match for a format."""
+    min_length, max_length = 0, 0
+    i = 0
+    while i < len(date_format):
+        char = date_format[i]
+        if char == '%':
+            low, high = _DIRECTIVE_WIDTHS[date_format[i + 1]]
+            i += 2
+        elif char.isspace():
+            # strptime matches a space in the format against any whitespace run
+            low, high = 1, math.inf
+            i += 1
+        else:
+            low = high = 1
+            i += 1
+        min_length += low
+        max_length += high
+    return min_length, max_length
+
+
+def _group_formats_by_length(formats: Sequence[str]) -> Tuple[Dict[int, Tuple[str, ...]], Tuple[str, ...]]:
+    """
+    Bucket formats by the input lengths they can match, keeping their order.
+    
+    Returns:
+        tuple: Formats per length up to the longest fixed-width match, and the
+            formats that can still match anything longer
+    """
+    ranges = [(date_format, *_format_length_range(date_format)) for date_format in formats]
+    longest = max(high for _, _, high in ranges if high != math.inf)
+    by_length = {
+        length: tuple(f for f, low, high in ranges if low <= length <= high)
+        for length in range(longest + 1)
+    }
+    unbounded = tuple(f for f, _, high in ranges if high == math.inf)
+    return by_length, unbounded
+
+
+# Today's (expiry timestamp, ISO date, year), refreshed at local midnight so bulk
+# validation compares against a cached value instead of calling datetime.now()
+_today_state: Tuple[float, str, int] = (0.0, '', 0)
+
+
+def _today() -> Tuple[float, str, int]:
+    """Return the cached (expiry, ISO date, year) for today, refreshing after midnight."""
+    global _today_state
+    if time.time() >= _today_state[0]:
+        today = date.today()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today_state = (midnight.timestamp(), today.isoformat(), today.year)
+    return _today_state
 
 
 class DateNormalizer:
@@ -31,13 +97,30 @@ class DateNormalizer:
         '%Y-%m-%d %H:%M:%S',    # 2024-03-15 10:30:00 (space separated)
     ]
     
-    # Regex patterns for date extraction
-    DATE_PATTERNS = {
-        'yyyymmdd': re.compile(r'\b(\d{8})\b'),                    # 20240901
-        'yyyy-mm-dd': re.compile(r'\b(\d{4}-\d{2}-\d{2})\b'),      # 2024-09-01
-        'mm/dd/yyyy': re.compile(r'\b(\d{1,2}/\d{1,2}/\d{4})\b'),  # 9/1/2024 or 09/01/2024
-        'mm-dd-yyyy': re.compile(r'\b(\d{1,2}-\d{1,2}-\d{4})\b'),  # 9-1-2024 or 09-01-2024
-        'text_dates': re.compile(r'\b((?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4})\b', re.IGNORECASE),
+    # Formats worth trying for a given input length, in SPL_DATE_FORMATS order,
+    # so most inputs try one or two formats instead of raising ValueError 15 times
+    FORMATS_BY_LENGTH, UNBOUNDED_FORMATS = _group_formats_by_length(SPL_DATE_FORMATS)
+    
+    # Longest possible month lengths (index 0 unused); Feb 29 is checked separately
+    MAX_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    
+    # Single regex for date extraction; the matching group name selects the formats
+    DATE_PATTERN = re.compile(
+        r'\b(?P<yyyymmdd>\d{8})\b'                      # 20240901
+        r'|\b(?P<yyyy_mm_dd>\d{4}-\d{2}-\d{2})\b'        # 2024-09-01
+        r'|\b(?P<mm_dd_yyyy_slash>\d{1,2}/\d{1,2}/\d{4})\b'  # 9/1/2024 or 09/01/2024
+        r'|\b(?P<mm_dd_yyyy_dash>\d{1,2}-\d{1,2}-\d{4})\b'   # 9-1-2024 or 09-01-2024
+        r'|\b(?P<text_date>(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s+\d{1,2},?\s+\d{4})\b',
+        re.IGNORECASE
+    )
+    
+    # The SPL_DATE_FORMATS entries that can parse each DATE_PATTERN group, in order
+    EXTRACTION_FORMATS = {
+        'yyyymmdd': ('%Y%m%d',),
+        'yyyy_mm_dd': ('%Y-%m-%d',),
+        'mm_dd_yyyy_slash': ('%m/%d/%Y', '%d/%m/%Y'),
+        'mm_dd_yyyy_dash': ('%m-%d-%Y',),
+        'text_date': ('%B %d, %Y', '%b %d, %Y'),
     }
     
     @classmethod
@@ -60,13 +143,29 @@ class DateNormalizer:
         if not date_str:
             return None
         
+        return cls._normalize_date_str(date_str)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=65536)
+    def _normalize_date_str(cls, date_str: str) -> Optional[str]:
+        """
+        Normalize a stripped date string; cached since SPL dates repeat heavily.
+        
+        Args:
+            date_str: Non-empty, stripped date string
+            
+        Returns:
+            str: ISO-8601 formatted date string or None if invalid
+        """
+        # YYYYMMDD and YYYY-MM-DD dominate SPL data, so parse them without strptime
+        fast_date = cls._parse_numeric_date(date_str)
+        if fast_date:
+            return fast_date
+        
         # Try parsing with known formats
-        for date_format in cls.SPL_DATE_FORMATS:
-            try:
-                parsed_date = datetime.strptime(date_str, date_format)
-                return parsed_date.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
+        parsed_date = cls._parse_with_formats(date_str)
+        if parsed_date:
+            return parsed_date
         
         # Try extracting date from longer text
         extracted_date = cls._extract_date_from_text(date_str)
@@ -75,21 +174,92 @@ class DateNormalizer:
         
         return None
     
+    @classmethod
+    def normalize_dates(cls, date_values: Iterable[Union[str, int, None]]) -> List[Optional[str]]:
+        """
+        Normalize a batch of date values, e.g. every effective time in a corpus.
+        
+        Each distinct value is normalized once; repeats are answered from a
+        local dict without re-entering normalize_date.
+        
+        Args:
+            date_values: Date values in any format accepted by normalize_date
+            
+        Returns:
+            list: ISO-8601 date strings (or None) in input order
+        """
+        normalized: Dict[Union[str, int, None], Optional[str]] = {}
+        results = []
+        for date_value in date_values:
+            if date_value not in normalized:
+                normalized[date_value] = cls.normalize_date(date_value)
+            results.append(normalized[date_value])
+        return results
+    
+    @classmethod
+    def _parse_numeric_date(cls, date_str: str) -> Optional[str]:
+        """
+        Parse YYYYMMDD or YYYY-MM-DD by slicing instead of strptime.
+        
+        Args:
+            date_str: Stripped date string
+            
+        Returns:
+            str: ISO-8601 date, or None to fall back to the strptime formats
+        """
+        length = len(date_str)
+        if length == 8:
+            digits = date_str
+        elif length == 10 and date_str[4] == '-' and date_str[7] == '-':
+            digits = date_str[:4] + date_str[5:7] + date_str[8:]
+        else:
+            return None
+        
+        if not (digits.isascii() and digits.isdigit()):
+            return None
+        
+        year, month, day = int(digits[:4]), int(digits[4:6]), int(digits[6:])
+        # Years below 1000 are left to strptime/strftime so output stays identical
+        if year < 1000 or not cls._is_valid_calendar_date(year, month, day):
+            return None
+        
+        return f"{year:04d}-{month:02d}-{day:02d}"
+    
+    @classmethod
+    def _is_valid_calendar_date(cls, year: int, month: int, day: int) -> bool:
+        """Check that year/month/day name a real calendar day."""
+        if year < 1 or not 1 <= month <= 12 or not 1 <= day <= cls.MAX_DAYS_IN_MONTH[month]:
+            return False
+        return not (month == 2 and day == 29 and not calendar.isleap(year))
+    
+    @classmethod
+    def _parse_with_formats(cls, date_str: str) -> Optional[str]:
+        """Parse a date with the SPL formats that can match its length."""
+        formats = cls.FORMATS_BY_LENGTH.get(len(date_str), cls.UNBOUNDED_FORMATS)
+        return cls._parse_first_format(date_str, formats)
+    
+    @classmethod
+    def _parse_first_format(cls, date_str: str, formats: Sequence[str]) -> Optional[str]:
+        """Parse a date with the first of the given formats that matches."""
+        for date_format in formats:
+            try:
+                parsed_date = datetime.strptime(date_str, date_format)
+                return parsed_date.strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        return None
+    
     @classmethod
     def _extract_date_from_text(cls, text: str) -> Optional[str]:
         """Extract and normalize the first valid date found in text."""
-        for pattern_name, pattern in cls.DATE_PATTERNS.items():
-            match = pattern.search(text)
-            if match:
-                date_str = match.group(1)
-                
-                # Try to parse the extracted date
-                for date_format in cls.SPL_DATE_FORMATS:
-                    try:
-                        parsed_date = datetime.strptime(date_str, date_format)
-                        return parsed_date.strftime('%Y-%m-%d')
-                    except ValueError:
-                        continue
+        for match in cls.DATE_PATTERN.finditer(text):
+            date_str = match.group(match.lastgroup)
+            
+            # Try to parse the extracted date with the formats for its shape
+            parsed_date = (cls._parse_numeric_date(date_str) or
+                           cls._parse_first_format(date_str, cls.EXTRACTION_FORMATS[match.lastgroup]))
+            if parsed_date:
+                return parsed_date
         
         return None
     
@@ -104,14 +274,16 @@ class DateNormalizer:
         Returns:
             bool: True if valid ISO-8601 date format
         """
-        if not date_str:
+        # Structural YYYY-MM-DD check plus calendar ranges, without a strptime round-trip
+        if not (isinstance(date_str, str) and len(date_str) == 10 and
+                date_str[4] == '-' and date_str[7] == '-'):
             return False
         
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-            return True
-        except ValueError:
+        digits = date_str[:4] + date_str[5:7] + date_str[8:]
+        if not (digits.isascii() and digits.isdigit()):
             return False
+        
+        return cls._is_valid_calendar_date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
     
     @classmethod
     def normalize_effective_time(cls, effective_time: Optional[str]) -> Optional[str]:
@@ -129,7 +301,7 @@ class DateNormalizer:
     @classmethod
     def get_current_date_iso(cls) -> str:
         """Get current date in ISO-8601 format."""
-        return datetime.now().strftime('%Y-%m-%d')
+        return _today()[1]
     
     @classmethod
     def is_future_date(cls, date_str: str) -> bool:
@@ -145,11 +317,8 @@ class DateNormalizer:
         if not cls.validate_iso_date(date_str):
             return False
         
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            return date_obj.date() > datetime.now().date()
-        except ValueError:
-            return False
+        # Fixed-width ISO-8601 dates sort lexicographically
+        return date_str > _today()[1]
     
     @classmethod
     def is_reasonable_drug_date(cls, date_str: str) -> bool:
@@ -165,11 +334,7 @@ class DateNormalizer:
         if not cls.validate_iso_date(date_str):
             return False
         
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            current_year = datetime.now().year
-            
-            # Reasonable range: 1950 to 5 years in the future
-            return 1950 <= date_obj.year <= (current_year + 5)
-        except ValueError:
-            return False
\ No newline at end of file
+        current_year = _today()[2]
+        
+        # Reasonable range: 1950 to 5 years in the future
+        return 1950 <= int(date_str[:4]) <= (current_year + 5)
\ No newline at end of file
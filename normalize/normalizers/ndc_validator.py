@@ -3,38 +3,35 @@ NDC (National Drug Code) validation and normalization utilities.
 Handles validation and standardization of NDC formats according to FDA standards.
 """
 
+import functools
 import re
+import sys
 from typing import List, Optional, Tuple, Set
 
 
 class NDCValidator:
     """Validates and normalizes NDC (National Drug Code) identifiers."""
     
-    # NDC format patterns (without hyphens)
-    NDC_PATTERNS = [
-        re.compile(r'^\d{10}$'),    # 10-digit format (most common)
-        re.compile(r'^\d{11}$'),    # 11-digit format
-    ]
+    # Full NDCs are 10 or 11 digits once hyphens and spaces are removed; this
+    # covers the 4-4-2, 5-3-2, 5-4-1 and 6-3-2 hyphenated configurations
+    NDC_DIGIT_LENGTHS = (10, 11)
     
-    # NDC format patterns (with hyphens) - various configurations
-    NDC_HYPHEN_PATTERNS = [
-        re.compile(r'^\d{4}-\d{4}-\d{2}$'),  # 4-4-2 format
-        re.compile(r'^\d{5}-\d{3}-\d{2}$'),  # 5-3-2 format  
-        re.compile(r'^\d{5}-\d{4}-\d{1}$'),  # 5-4-1 format
-        re.compile(r'^\d{6}-\d{3}-\d{2}$'),  # 6-3-2 format (less common)
-    ]
-    
-    # Partial NDC patterns (product-level, missing package code) - valid in SPL contexts
-    PARTIAL_NDC_PATTERNS = [
-        re.compile(r'^\d{4}-\d{4}$'),        # 4-4 format (product level)
-        re.compile(r'^\d{5}-\d{3}$'),        # 5-3 format (product level)
-        re.compile(r'^\d{5}-\d{4}$'),        # 5-4 format (product level) 
-        re.compile(r'^\d{6}-\d{3}$'),        # 6-3 format (product level)
-    ]
+    # Partial NDC shapes (product-level, missing package code) - valid in SPL contexts,
+    # as (labeler digits, product digits) around a single hyphen
+    PARTIAL_NDC_SHAPES = frozenset({
+        (4, 4),     # 4-4 format (product level)
+        (5, 3),     # 5-3 format (product level)
+        (5, 4),     # 5-4 format (product level)
+        (6, 3),     # 6-3 format (product level)
+    })
     
     # Pattern for extracting NDC from text
     NDC_EXTRACTION_PATTERN = re.compile(r'\b(?:NDC[:\s]*)?(\d{4,6}[-\s]?\d{3,4}[-\s]?\d{1,2})\b', re.IGNORECASE)
     
+    # Patterns used when cleaning NDC strings
+    NDC_PREFIX_PATTERN = re.compile(r'^NDC[:\s]*', re.IGNORECASE)
+    NDC_SEPARATOR_PATTERN = re.compile(r'[-\s]')
+    
     @classmethod
     def validate_ndc(cls, ndc: str) -> bool:
         """
@@ -49,27 +46,32 @@ class NDCValidator:
         if not ndc:
             return False
         
+        return cls._validate_ndc_str(ndc)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=65536)
+    def _validate_ndc_str(cls, ndc: str) -> bool:
+        """Validate a non-empty NDC string; cached since SPL data repeats NDCs heavily."""
         ndc_clean = cls._clean_ndc(ndc)
         
-        # Check basic patterns first
-        for pattern in cls.NDC_PATTERNS:
-            if pattern.match(ndc_clean):
-                return cls._validate_ndc_structure(ndc_clean)
-        
-        # Check hyphenated patterns
-        for pattern in cls.NDC_HYPHEN_PATTERNS:
-            if pattern.match(ndc):
-                # Convert to clean format and validate
-                ndc_clean = ndc.replace('-', '')
-                return cls._validate_ndc_structure(ndc_clean)
-        
-        # Check partial NDC patterns (valid in SPL contexts)
-        for pattern in cls.PARTIAL_NDC_PATTERNS:
-            if pattern.match(ndc):
-                # Partial NDCs are valid for product-level identification
-                return True
-        
-        return False
+        # Full NDCs, plain or hyphenated, reduce to 10 or 11 digits
+        if len(ndc_clean) in cls.NDC_DIGIT_LENGTHS and ndc_clean.isdecimal():
+            return cls._validate_ndc_structure(ndc_clean)
+        
+        # Partial NDCs are valid for product-level identification (SPL contexts)
+        return cls._is_partial_ndc(ndc)
+    
+    @classmethod
+    def _is_partial_ndc(cls, ndc: str) -> bool:
+        """Check if a raw NDC is a product-level NDC such as 12345-678."""
+        # A single trailing newline was tolerated by the original '$'-anchored patterns
+        if ndc.endswith('\n'):
+            ndc = ndc[:-1]
+        
+        labeler_code, hyphen, product_code = ndc.partition('-')
+        return (bool(hyphen) and
+                (len(labeler_code), len(product_code)) in cls.PARTIAL_NDC_SHAPES and
+                labeler_code.isdecimal() and product_code.isdecimal())
     
     @classmethod
     def normalize_ndc(cls, ndc: str) -> Optional[str]:
@@ -82,30 +84,34 @@ class NDCValidator:
         Returns:
             str: Normalized NDC or None if invalid
         """
-        if not cls.validate_ndc(ndc):
+        if not ndc:
             return None
         
-        # Check if it's a partial NDC first
-        for pattern in cls.PARTIAL_NDC_PATTERNS:
-            if pattern.match(ndc):
-                # Return partial NDC as-is (already properly formatted)
-                return ndc
-        
+        return cls._normalize_ndc_str(ndc)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=65536)
+    def _normalize_ndc_str(cls, ndc: str) -> Optional[str]:
+        """Normalize a non-empty NDC string, cleaning and validating it once (cached)."""
         ndc_clean = cls._clean_ndc(ndc)
         
-        # Pad to 10 digits if needed (some NDCs are stored with leading zeros removed)
-        if len(ndc_clean) == 9:
-            ndc_clean = '0' + ndc_clean
-        elif len(ndc_clean) == 11:
-            # For 11-digit NDCs, typically remove the first digit if it's 0
-            if ndc_clean.startswith('0'):
-                ndc_clean = ndc_clean[1:]
+        if not (len(ndc_clean) in cls.NDC_DIGIT_LENGTHS and ndc_clean.isdecimal()):
+            # Return partial NDC as-is (already properly formatted)
+            return ndc if cls._is_partial_ndc(ndc) else None
+        
+        if not cls._validate_ndc_structure(ndc_clean):
+            return None
+        
+        # For 11-digit NDCs, typically remove the first digit if it's 0
+        if len(ndc_clean) == 11 and ndc_clean.startswith('0'):
+            ndc_clean = ndc_clean[1:]
         
         if len(ndc_clean) != 10:
             return None
         
-        # Format as 5-4-1 (FDA standard)
-        return f"{ndc_clean[:5]}-{ndc_clean[5:9]}-{ndc_clean[9:]}"
+        # Format as 5-4-1 (FDA standard); interned so repeated NDCs share one string
+        # even after they fall out of the normalization cache
+        return sys.intern(f"{ndc_clean[:5]}-{ndc_clean[5:9]}-{ndc_clean[9:]}")
     
     @classmethod
     def extract_ndcs_from_text(cls, text: str) -> List[str]:
@@ -122,11 +128,12 @@ class NDCValidator:
             return []
         
         ndcs = []
-        matches = cls.NDC_EXTRACTION_PATTERN.findall(text)
+        seen = set()
         
-        for match in matches:
-            normalized = cls.normalize_ndc(match)
-            if normalized and normalized not in ndcs:
+        for match in cls.NDC_EXTRACTION_PATTERN.finditer(text):
+            normalized = cls.normalize_ndc(match.group(1))
+            if normalized and normalized not in seen:
+                seen.add(normalized)
                 ndcs.append(normalized)
         
         return ndcs
@@ -137,11 +144,16 @@ class NDCValidator:
         if not ndc:
             return ""
         
+        # Digit-only and hyphenated NDCs (the usual SPL forms) need no regex work
+        digits = ndc.replace('-', '')
+        if digits.isdecimal():
+            return digits
+        
         # Remove common prefixes
-        clean = re.sub(r'^NDC[:\s]*', '', ndc, flags=re.IGNORECASE)
+        clean = cls.NDC_PREFIX_PATTERN.sub('', ndc)
         
         # Remove hyphens and spaces
-        clean = re.sub(r'[-\s]', '', clean)
+        clean = cls.NDC_SEPARATOR_PATTERN.sub('', clean)
         
         return clean.strip()
     
@@ -159,18 +171,14 @@ class NDCValidator:
             return False
         
         # Basic sanity checks - NDC shouldn't be all zeros or all the same digit
-        if len(set(ndc_clean)) == 1:
+        # (compared against a repeated first digit rather than building a set)
+        if ndc_clean == ndc_clean[0] * len(ndc_clean):
             return False
         
-        # For 10-digit NDCs, validate basic structure
-        if len(ndc_clean) == 10:
-            # First part (labeler code) shouldn't be all zeros
-            if ndc_clean[:5] == '00000':
-                return False
-            
-            # Product code shouldn't be all zeros
-            if ndc_clean[5:9] == '0000':
-                return False
+        # For 10-digit NDCs, neither the labeler code nor the product code
+        # should be all zeros
+        if len(ndc_clean) == 10 and (ndc_clean[:5] == '00000' or ndc_clean[5:9] == '0000'):
+            return False
         
         return True
     
@@ -258,12 +266,10 @@ class NDCValidator:
         invalid = []
         
         for ndc in ndcs:
-            if cls.validate_ndc(ndc):
-                normalized = cls.normalize_ndc(ndc)
-                if normalized:
-                    valid.append(normalized)
-                else:
-                    invalid.append(ndc)
+            # normalize_ndc returns None for anything validate_ndc rejects
+            normalized = cls.normalize_ndc(ndc)
+            if normalized:
+                valid.append(normalized)
             else:
                 invalid.append(ndc)
         
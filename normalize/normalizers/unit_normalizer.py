@@ -5,6 +5,7 @@ Converts common pharmaceutical units to UCUM (Unified Code for Units of Measure)
 
 from typing import Dict, Optional, Tuple
 import re
+import sys
 
 
 class UnitNormalizer:
@@ -132,6 +133,31 @@ class UnitNormalizer:
         'iu per mL': '[IU]/mL',
     }
     
+    # Single lookup table over both mappings (their keys do not overlap); values are
+    # interned so every normalized unit shares one object for cheap hashing/comparison
+    UNIT_LOOKUP = {key: sys.intern(value) for key, value in {**COMBINATION_MAPPINGS, **UNIT_MAPPINGS}.items()}
+    
+    # All UCUM units produced by the mappings above, for O(1) validity checks
+    UCUM_UNITS = frozenset(UNIT_LOOKUP.values())
+    
+    # Categories of normalized units; ratio units (containing '/') are detected separately
+    UNIT_CATEGORIES = {
+        'mass': ('g', 'mg', 'ug', 'kg'),
+        'volume': ('L', 'mL', 'uL'),
+        'time': ('h', 'd', 'wk', 'mo', 'a'),
+        'dose_form': ('{tablet}', '{capsule}', 'U', '[IU]'),
+        'special': ('gtt', '{spray}', '{puff}', '{application}'),
+        'concentration': ('%', '[ppm]', '[ppb]'),
+        'area': ('cm2',),
+    }
+    
+    # Reverse index of UNIT_CATEGORIES
+    UNIT_TO_CATEGORY = {
+        unit: category
+        for category, units in UNIT_CATEGORIES.items()
+        for unit in units
+    }
+    
     # Regex patterns for unit extraction
     UNIT_PATTERN = re.compile(r'\b(\d*\.?\d+)\s*([a-zA-Zμ%]+(?:/[a-zA-Zμ%]+)?)\b')
     
@@ -150,25 +176,10 @@ class UnitNormalizer:
             return None
         
         # Clean and normalize input
-        unit_clean = unit.strip().lower()
-        
-        # Check direct mappings first
-        if unit_clean in cls.UNIT_MAPPINGS:
-            return cls.UNIT_MAPPINGS[unit_clean]
-        
-        # Check combination mappings
-        if unit_clean in cls.COMBINATION_MAPPINGS:
-            return cls.COMBINATION_MAPPINGS[unit_clean]
-        
-        # Try case-sensitive lookup for abbreviations
         unit_original = unit.strip()
-        if unit_original in cls.UNIT_MAPPINGS:
-            return cls.UNIT_MAPPINGS[unit_original]
         
-        if unit_original in cls.COMBINATION_MAPPINGS:
-            return cls.COMBINATION_MAPPINGS[unit_original]
-        
-        return None
+        # Check the lowercased unit first, then try case-sensitive lookup for abbreviations
+        return cls.UNIT_LOOKUP.get(unit_original.lower()) or cls.UNIT_LOOKUP.get(unit_original)
     
     @classmethod
     def normalize_quantity_string(cls, quantity_str: str) -> Optional[Tuple[float, str]]:
@@ -246,7 +257,7 @@ class UnitNormalizer:
             return False
         
         # Check if it's one of our known UCUM mappings
-        return unit in cls.UNIT_MAPPINGS.values() or unit in cls.COMBINATION_MAPPINGS.values()
+        return unit in cls.UCUM_UNITS
     
     @classmethod
     def get_unit_category(cls, unit: str) -> Optional[str]:
@@ -259,27 +270,10 @@ class UnitNormalizer:
         Returns:
             str: Unit category or None if not recognized
         """
-        mass_units = {'g', 'mg', 'ug', 'kg'}
-        volume_units = {'L', 'mL', 'uL'}
-        time_units = {'h', 'd', 'wk', 'mo', 'a'}
-        dose_form_units = {'{tablet}', '{capsule}', 'U', '[IU]'}
-        special_units = {'gtt', '{spray}', '{puff}', '{application}'}
-        
-        if unit in mass_units:
-            return 'mass'
-        elif unit in volume_units:
-            return 'volume'  
-        elif unit in time_units:
-            return 'time'
-        elif unit in dose_form_units:
-            return 'dose_form'
-        elif unit in special_units:
-            return 'special'
+        category = cls.UNIT_TO_CATEGORY.get(unit)
+        if category:
+            return category
         elif '/' in unit:
             return 'ratio'
-        elif unit in ['%', '[ppm]', '[ppb]']:
-            return 'concentration'
-        elif unit == 'cm2':
-            return 'area'
         else:
             return None
\ No newline at end of file
@@ -3,6 +3,7 @@ Text cleaning utilities for SPL clinical text processing.
 Removes XML markup and normalizes whitespace while preserving semantic structure.
 """
 
+import functools
 import re
 from html import unescape
 from typing import Optional
@@ -13,12 +14,29 @@ class TextCleaner:
     
     # XML/HTML tag removal patterns
     XML_TAG_PATTERN = re.compile(r'<[^>]+>')
+    BLOCK_TAG_PATTERN = re.compile(r'</?(div|p|br|li|ul|ol)[^>]*>', re.IGNORECASE)
     ENTITY_PATTERN = re.compile(r'&[a-zA-Z][a-zA-Z0-9]*;')
     
+    # Applied in order before html.unescape; '&amp;' is decoded ahead of the
+    # entities that follow it, so '&amp;deg;' becomes '°'
+    COMMON_ENTITIES = {
+        '&nbsp;': ' ',
+        '&lt;': '<',
+        '&gt;': '>',
+        '&amp;': '&',
+        '&quot;': '"',
+        '&apos;': "'",
+        '&deg;': '°',
+        '&micro;': 'μ',
+        '&plusmn;': '±',
+    }
+    
     # Whitespace normalization patterns
     MULTIPLE_SPACES = re.compile(r'\s+')
     MULTIPLE_NEWLINES = re.compile(r'\n\s*\n')
     LEADING_TRAILING_WS = re.compile(r'^\s+|\s+$')
+    # Whitespace-delimited token of 3+ letter-like characters; confirmed with isalpha()
+    WORD_PATTERN = re.compile(r'(?<!\S)[^\W\d_]{3,}(?!\S)')
     
     # Preserve semantic formatting patterns
     BULLET_PATTERNS = [
@@ -27,6 +45,8 @@ class TextCleaner:
         re.compile(r'^\s*\d+\.\s*', re.MULTILINE),        # Numbered lists
         re.compile(r'^\s*[a-zA-Z]\.\s*', re.MULTILINE),   # Lettered lists
     ]
+    # Any single list marker; alternatives are tried in BULLET_PATTERNS order
+    BULLET_PATTERN = re.compile(r'^\s*(?:[•·∙▪▫◦‣⁃]|[-*+]|\d+\.|[a-zA-Z]\.)\s*', re.MULTILINE)
     
     @classmethod
     def clean_clinical_text(cls, text: str) -> str:
@@ -42,17 +62,32 @@ class TextCleaner:
         if not text or not text.strip():
             return ""
         
+        return cls._clean_clinical_text_str(text)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def _clean_clinical_text_str(cls, text: str) -> str:
+        """
+        Clean non-blank clinical text; cached since sections are often re-cleaned.
+        
+        Args:
+            text: Non-blank raw clinical text
+            
+        Returns:
+            str: Cleaned and normalized text
+        """
+        # Plain text has no markup or entities, so only layout needs cleaning
+        if '<' not in text and '&' not in text:
+            return cls._normalize_layout(text).strip()
+        
         # Step 1: Remove XML/HTML tags but preserve content
         cleaned = cls._remove_xml_tags(text)
         
         # Step 2: Handle HTML entities
         cleaned = cls._decode_entities(cleaned)
         
-        # Step 3: Normalize whitespace while preserving structure
-        cleaned = cls._normalize_whitespace(cleaned)
-        
-        # Step 4: Clean up but preserve list formatting
-        cleaned = cls._preserve_list_formatting(cleaned)
+        # Step 3: Normalize whitespace and list formatting in one pass
+        cleaned = cls._normalize_layout(cleaned)
         
         return cleaned.strip()
     
@@ -60,7 +95,7 @@ class TextCleaner:
     def _remove_xml_tags(cls, text: str) -> str:
         """Remove XML/HTML tags while preserving text content."""
         # Handle common structural tags by adding spacing
-        text = re.sub(r'</?(div|p|br|li|ul|ol)[^>]*>', ' ', text, flags=re.IGNORECASE)
+        text = cls.BLOCK_TAG_PATTERN.sub(' ', text)
         
         # Remove all other XML/HTML tags
         text = cls.XML_TAG_PATTERN.sub('', text)
@@ -70,20 +105,11 @@ class TextCleaner:
     @classmethod
     def _decode_entities(cls, text: str) -> str:
         """Decode HTML entities to their Unicode equivalents."""
+        if '&' not in text:
+            return text
+        
         # First handle common medical entities manually for better control
-        common_entities = {
-            '&nbsp;': ' ',
-            '&lt;': '<',
-            '&gt;': '>',
-            '&amp;': '&',
-            '&quot;': '"',
-            '&apos;': "'",
-            '&deg;': '°',
-            '&micro;': 'μ',
-            '&plusmn;': '±',
-        }
-        
-        for entity, replacement in common_entities.items():
+        for entity, replacement in cls.COMMON_ENTITIES.items():
             text = text.replace(entity, replacement)
         
         # Handle remaining entities with html.unescape
@@ -96,43 +122,17 @@ class TextCleaner:
         return text
     
     @classmethod
-    def _normalize_whitespace(cls, text: str) -> str:
-        """Normalize whitespace while preserving paragraph structure."""
-        # Replace multiple spaces with single space
-        text = cls.MULTIPLE_SPACES.sub(' ', text)
+    def _normalize_layout(cls, text: str) -> str:
+        """Collapse whitespace and clean up list marker spacing in a single pass."""
+        text = cls.MULTIPLE_SPACES.sub(' ', text).strip()
         
-        # Preserve paragraph breaks (double newlines) but clean up extras
-        text = cls.MULTIPLE_NEWLINES.sub('\n\n', text)
+        # Collapsing \s+ leaves a single line, so only a leading marker can match
+        match = cls.BULLET_PATTERN.match(text)
+        if match:
+            return match.group().strip() + ' ' + text[match.end():]
         
         return text
     
-    @classmethod
-    def _preserve_list_formatting(cls, text: str) -> str:
-        """Preserve and clean up list formatting."""
-        lines = text.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                cleaned_lines.append('')
-                continue
-            
-            # Check if line starts with bullet or number
-            is_list_item = any(pattern.match(line) for pattern in cls.BULLET_PATTERNS)
-            
-            if is_list_item:
-                # Clean up list item spacing
-                for pattern in cls.BULLET_PATTERNS:
-                    if pattern.match(line):
-                        # Normalize the bullet/number spacing
-                        line = pattern.sub(lambda m: m.group().strip() + ' ', line)
-                        break
-            
-            cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines)
-    
     @classmethod
     def extract_plain_text(cls, text: str) -> str:
         """
@@ -147,11 +147,26 @@ class TextCleaner:
         if not text:
             return ""
         
+        return cls._extract_plain_text_str(text)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def _extract_plain_text_str(cls, text: str) -> str:
+        """
+        Extract plain text from non-empty text; cached for repeated content checks.
+        
+        Args:
+            text: Non-empty text that may contain formatting
+            
+        Returns:
+            str: Plain text suitable for basic NLP processing
+        """
         # Remove all XML/HTML
-        plain = cls.XML_TAG_PATTERN.sub(' ', text)
+        plain = cls.XML_TAG_PATTERN.sub(' ', text) if '<' in text else text
         plain = cls._decode_entities(plain)
         
-        # Remove all bullet points and list markers
+        # Remove all bullet points and list markers; applying the patterns in
+        # sequence strips stacked markers such as "• 1." from a line start
         for pattern in cls.BULLET_PATTERNS:
             plain = pattern.sub('', plain)
         
@@ -181,7 +196,12 @@ class TextCleaner:
         if len(plain_text) < 10:
             return False
         
-        # Check for meaningful words (not just numbers/symbols)
-        word_count = len([word for word in plain_text.split() if word.isalpha() and len(word) > 2])
+        # Check for meaningful words (not just numbers/symbols), stopping at the third
+        word_count = 0
+        for match in cls.WORD_PATTERN.finditer(plain_text):
+            if match.group().isalpha():
+                word_count += 1
+                if word_count >= 3:
+                    return True
         
-        return word_count >= 3
\ No newline at end of file
+        return False
\ No newline at end of file
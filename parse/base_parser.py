@@ -3,11 +3,13 @@ Base parser classes and utilities for SPL document parsing.
 Provides foundation classes for XML parsing and data extraction.
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from typing import Optional, Dict, List, Any, Union
 from abc import ABC, abstractmethod
 import logging
+import re
 from datetime import datetime
+from types import MappingProxyType
 
 from models import (
     SPLDocument, SPLSection, CodedConcept, Organization, 
@@ -15,6 +17,18 @@ from models import (
 )
 
 
+# Mirrors xml.etree defaults: comments and processing instructions are dropped,
+# internal entities are expanded and there is no size limit. Strings are passed
+# in as UTF-8, so any encoding declaration in the document is overridden
+SPL_XML_PARSER = ET.XMLParser(
+    encoding='utf-8',
+    remove_comments=True,
+    remove_pis=True,
+    resolve_entities='internal',
+    huge_tree=True
+)
+
+
 class ParseError(Exception):
     """Custom exception for parsing errors."""
     pass
@@ -43,55 +57,46 @@ class SPLNamespaces:
         }
 
 
+# Shared default namespace map, so lookups do not rebuild it on every call
+_NS_DEFAULT = SPLNamespaces.get_namespaces_with_default()
+
+# "hl7:tag" -> "{urn:hl7-org:v3}tag"; None for tags without the hl7: prefix
+_QNAME_CACHE: Dict[str, Optional[str]] = {}
+
+
+def _qn(tag: str) -> Optional[str]:
+    """Return the Clark-notation name for an hl7:-prefixed tag, memoized per tag."""
+    try:
+        return _QNAME_CACHE[tag]
+    except KeyError:
+        qname = f"{{{SPLNamespaces.HL7_V3}}}{tag[4:]}" if tag.startswith("hl7:") else None
+        _QNAME_CACHE[tag] = qname
+        return qname
+
+
 class XMLUtils:
     """Utility functions for XML parsing."""
     
     @staticmethod
-    def find_element(parent: ET.Element, tag: str, namespaces: Optional[Dict[str, str]] = None) -> Optional[ET.Element]:
+    def find_element(parent: ET.Element, tag: str) -> Optional[ET.Element]:
         """Find first child element with given tag, handling both prefixed and default namespace elements."""
-        if namespaces is None:
-            namespaces = SPLNamespaces.get_namespaces_with_default()
+        # hl7:-prefixed tags resolve to a single Clark-notation lookup; the
+        # prefixed form maps to the same namespace, so no second try is needed
+        qname = _qn(tag)
+        if qname is not None:
+            return parent.find(qname)
         
-        # If tag has hl7: prefix, try with explicit namespace
-        if tag.startswith("hl7:"):
-            unprefixed_tag = tag[4:]  # Remove "hl7:" prefix
-            # Try with explicit namespace first
-            result = parent.find(f"{{{SPLNamespaces.HL7_V3}}}{unprefixed_tag}")
-            if result is not None:
-                return result
-            
-            # Fallback: try with namespace prefix
-            result = parent.find(tag, namespaces)
-            if result is not None:
-                return result
-        else:
-            # For non-prefixed tags, try as-is first
-            result = parent.find(tag, namespaces)
-            if result is not None:
-                return result
-        
-        return None
+        # Non-prefixed tags resolve against the default HL7 v3 namespace
+        return parent.find(tag, _NS_DEFAULT)
     
     @staticmethod
-    def find_all_elements(parent: ET.Element, tag: str, namespaces: Optional[Dict[str, str]] = None) -> List[ET.Element]:
+    def find_all_elements(parent: ET.Element, tag: str) -> List[ET.Element]:
         """Find all child elements with given tag, handling both prefixed and default namespace elements."""
-        if namespaces is None:
-            namespaces = SPLNamespaces.get_namespaces_with_default()
+        qname = _qn(tag)
+        if qname is not None:
+            return parent.findall(qname)
         
-        # If tag has hl7: prefix, try with explicit namespace
-        if tag.startswith("hl7:"):
-            unprefixed_tag = tag[4:]  # Remove "hl7:" prefix
-            # Try with explicit namespace first
-            results = parent.findall(f"{{{SPLNamespaces.HL7_V3}}}{unprefixed_tag}")
-            if results:
-                return results
-            
-            # Fallback: try with namespace prefix
-            results = parent.findall(tag, namespaces)
-            return results
-        else:
-            # For non-prefixed tags, try as-is
-            return parent.findall(tag, namespaces)
+        return parent.findall(tag, _NS_DEFAULT)
     
     @staticmethod
     def get_attribute(element: ET.Element, attr_name: str) -> Optional[str]:
@@ -225,7 +230,7 @@ class DocumentAuthorParser(BaseParser):
 class SectionTypeMapper:
     """Maps LOINC codes to section types."""
     
-    CODE_TO_TYPE = {
+    _CODE_TO_TYPE = {
         "48780-1": SectionType.SPL_LISTING,
         "55106-9": SectionType.ACTIVE_INGREDIENT,
         "55105-1": SectionType.PURPOSE,
@@ -241,15 +246,19 @@ class SectionTypeMapper:
         "42229-5": SectionType.UNCLASSIFIED,
     }
     
-    @classmethod
-    def get_section_type(cls, loinc_code: str) -> Optional[SectionType]:
-        """Get section type from LOINC code."""
-        return cls.CODE_TO_TYPE.get(loinc_code)
+    # Read-only view, so the shared mapping cannot be modified by callers
+    CODE_TO_TYPE = MappingProxyType(_CODE_TO_TYPE)
+    
+    # Get section type from LOINC code (None if unmapped); bound directly to
+    # dict.get so each call skips classmethod dispatch and attribute lookups
+    get_section_type = staticmethod(_CODE_TO_TYPE.get)
 
 
 class TextExtractor:
     """Utility for extracting and cleaning text from SPL sections."""
     
+    MULTIPLE_WHITESPACE = re.compile(r'\s+')
+    
     @staticmethod
     def extract_section_text(text_element: ET.Element) -> str:
         """
@@ -260,47 +269,59 @@ class TextExtractor:
             return ""
         
         text_parts = []
-        TextExtractor._extract_text_recursive(text_element, text_parts)
+        TextExtractor._extract_text_parts(text_element, text_parts)
         
         # Join and clean up the text
         full_text = " ".join(text_parts)
         return TextExtractor._clean_text(full_text)
     
     @staticmethod
-    def _extract_text_recursive(element: ET.Element, text_parts: List[str]) -> None:
-        """Recursively extract text from nested elements."""
+    def _extract_text_parts(element: ET.Element, text_parts: List[str]) -> None:
+        """Extract text from nested elements using an explicit stack instead of recursion."""
+        append = text_parts.append
+        
         # Add element's direct text
-        if element.text and element.text.strip():
-            text_parts.append(element.text.strip())
+        text = element.text.strip() if element.text else None
+        if text:
+            append(text)
         
-        # Process child elements
-        for child in element:
+        # Each frame holds the children still to visit, whether they are list
+        # items, and the text to append once they are exhausted (tail or newline)
+        stack = [(iter(element), False, None)]
+        while stack:
+            children, is_list, closing = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if closing:
+                    append(closing)
+                continue
+            
+            text = child.text.strip() if child.text else None
+            
+            # List items get a bullet and a trailing newline; their tails are dropped
+            if is_list:
+                append("• ")
+                if text:
+                    append(text)
+                stack.append((iter(child), False, "\n"))
+                continue
+            
+            tail = child.tail.strip() if child.tail else None
             if child.tag.endswith("br"):
-                text_parts.append("\n")
+                append("\n")
+                if tail:
+                    append(tail)
             elif child.tag.endswith("list"):
-                TextExtractor._extract_list_text(child, text_parts)
+                items = XMLUtils.find_all_elements(child, "hl7:item")
+                stack.append((iter(items), True, tail))
             else:
-                TextExtractor._extract_text_recursive(child, text_parts)
-            
-            # Add tail text
-            if child.tail and child.tail.strip():
-                text_parts.append(child.tail.strip())
-    
-    @staticmethod
-    def _extract_list_text(list_element: ET.Element, text_parts: List[str]) -> None:
-        """Extract text from list elements."""
-        items = XMLUtils.find_all_elements(list_element, "hl7:item")
-        for item in items:
-            text_parts.append("• ")
-            TextExtractor._extract_text_recursive(item, text_parts)
-            text_parts.append("\n")
+                if text:
+                    append(text)
+                stack.append((iter(child), False, tail))
     
     @staticmethod
     def _clean_text(text: str) -> str:
         """Clean and normalize extracted text."""
-        # Replace multiple whitespace with single space
-        import re
-        text = re.sub(r'\s+', ' ', text)
-        # Clean up line breaks
-        text = re.sub(r'\n\s*\n', '\n', text)
-        return text.strip()
\ No newline at end of file
+        # Replace multiple whitespace (line breaks included) with single space
+        return TextExtractor.MULTIPLE_WHITESPACE.sub(' ', text).strip()
\ No newline at end of file
@@ -3,24 +3,28 @@ Batch Processing Infrastructure.
 Handles parallel processing of multiple SPL files with progress tracking and error recovery.
 """
 
+import fnmatch
 import os
-import json
 import time
 from pathlib import Path
 from typing import List, Dict, Optional, Callable, Any, Iterator, Tuple
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, Future
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, Future, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime
 import logging
 import threading
+from collections import deque
 from queue import Queue
 
+import orjson
+
 from spl_document_parser import SPLDocumentParser, SPLParseResult, parse_spl_file
 from parser_factory import ParserManager, PresetConfigurations
 from models import SPLDocument
 
 
-@dataclass
+@dataclass(slots=True)
 class BatchJob:
     """Represents a batch processing job."""
     job_id: str
@@ -30,6 +34,7 @@ class BatchJob:
     use_multiprocessing: bool = False
     continue_on_error: bool = True
     save_results: bool = True
+    one_file_per_doc: bool = False  # Legacy layout: one JSON file per document instead of a JSONL file
     created_at: datetime = None
     
     def __post_init__(self):
@@ -37,7 +42,7 @@ class BatchJob:
             self.created_at = datetime.now()
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessingResult:
     """Result of processing a single file."""
     file_path: str
@@ -53,7 +58,7 @@ class ProcessingResult:
             self.warnings = []
 
 
-@dataclass
+@dataclass(slots=True)
 class BatchResult:
     """Result of a complete batch processing job."""
     job_id: str
@@ -76,32 +81,46 @@ class BatchResult:
 class ProgressTracker:
     """Thread-safe progress tracking for batch operations."""
     
-    def __init__(self, total_items: int):
+    __slots__ = ('total_items', 'completed_items', 'failed_items', 'lock', 'start_time', 'callbacks',
+                 'callback_interval', '_last_callback_at')
+    
+    def __init__(self, total_items: int, callback_interval: float = 0.1):
         self.total_items = total_items
         self.completed_items = 0
         self.failed_items = 0
         self.lock = threading.Lock()
         self.start_time = time.time()
         self.callbacks: List[Callable] = []
+        # Minimum seconds between callback rounds; the final update always reports
+        self.callback_interval = callback_interval
+        self._last_callback_at = 0.0
     
     def add_callback(self, callback: Callable[[int, int, int, float], None]):
         """Add a progress callback function."""
         self.callbacks.append(callback)
     
     def update(self, success: bool = True):
-        """Update progress counters."""
+        """Update progress counters, notifying callbacks at most once per callback_interval."""
         with self.lock:
             self.completed_items += 1
             if not success:
                 self.failed_items += 1
             
-            # Call callbacks
-            elapsed_time = time.time() - self.start_time
-            for callback in self.callbacks:
-                try:
-                    callback(self.completed_items, self.total_items, self.failed_items, elapsed_time)
-                except Exception:
-                    pass  # Don't let callback errors stop processing
+            # Snapshot under the lock; callbacks run outside it
+            now = time.time()
+            completed = self.completed_items
+            failed = self.failed_items
+            if completed != self.total_items and now - self._last_callback_at < self.callback_interval:
+                return
+            self._last_callback_at = now
+        
+        # Call callbacks
+        elapsed_time = now - self.start_time
+        for callback in self.callbacks:
+            try:
+                callback(completed, self.total_items, failed, elapsed_time)
+            except Exception:
+                pass  # Don't let callback errors stop processing
     
     def get_progress(self) -> Dict[str, Any]:
         """Get current progress information."""
@@ -155,6 +174,8 @@ class BatchProcessor:
             # Process files
             if job.use_multiprocessing:
                 results = self._process_with_multiprocessing(job, progress_tracker)
+            elif job.max_workers <= 1 or len(job.file_paths) <= 1:
+                results = self._process_sequentially(job, progress_tracker)
             else:
                 results = self._process_with_threading(job, progress_tracker)
             
@@ -180,7 +201,7 @@ class BatchProcessor:
             
             # Save results if requested
             if job.save_results and job.output_directory:
-                self._save_batch_results(batch_result, job.output_directory)
+                self._save_batch_results(batch_result, job.output_directory, job.one_file_per_doc)
             
             self.logger.info(f"Batch job {job.job_id} completed: {successful}/{len(results)} successful")
             
@@ -193,6 +214,18 @@ class BatchProcessor:
             # Clean up
             self.active_jobs.pop(job.job_id, None)
     
+    def _process_sequentially(self, job: BatchJob, progress_tracker: ProgressTracker) -> List[ProcessingResult]:
+        """Process files one after another in the calling thread."""
+        results = []
+        
+        # _process_single_file reports failures in its result rather than raising
+        for file_path in job.file_paths:
+            result = self._process_single_file(file_path)
+            results.append(result)
+            progress_tracker.update(result.success)
+        
+        return results
+    
     def _process_with_threading(self, job: BatchJob, progress_tracker: ProgressTracker) -> List[ProcessingResult]:
         """Process files using thread-based parallelism."""
         results = []
@@ -230,35 +263,80 @@ class BatchProcessor:
     def _process_with_multiprocessing(self, job: BatchJob, progress_tracker: ProgressTracker) -> List[ProcessingResult]:
         """Process files using process-based parallelism."""
         results = []
+        file_paths = job.file_paths
         
-        with ProcessPoolExecutor(max_workers=job.max_workers) as executor:
-            # Submit all jobs using the global function
-            future_to_file = {
-                executor.submit(_process_file_worker, file_path): file_path
-                for file_path in job.file_paths
-            }
-            
-            # Collect results
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    result = future.result()
+        # Hand files out in a few chunks per worker to keep dispatch overhead low
+        chunksize = max(1, len(file_paths) // (job.max_workers * 4))
+        
+        try:
+            with ProcessPoolExecutor(max_workers=job.max_workers, initializer=_init_worker_processor) as executor:
+                for result in executor.map(_process_file_worker, file_paths, chunksize=chunksize):
                     results.append(result)
                     progress_tracker.update(result.success)
-                except Exception as e:
-                    error_result = ProcessingResult(
-                        file_path=file_path,
-                        success=False,
-                        error_message=str(e)
-                    )
-                    results.append(error_result)
-                    progress_tracker.update(False)
-                    
-                    if not job.continue_on_error:
-                        break
+            return results
+        except Exception:
+            # map gives up at the first failed chunk without saying which file failed
+            remaining = deque(file_paths[len(results):])
+        
+        # Finish the remaining files one task each, keeping at most one task per worker
+        # in flight. When a worker dies, only the in-flight files can be the cause: the
+        # rest go to a fresh pool and each suspect is retried in a pool of its own.
+        while remaining:
+            suspects = []
+            with ProcessPoolExecutor(max_workers=job.max_workers, initializer=_init_worker_processor) as executor:
+                in_flight: Dict[Future, str] = {}
+                try:
+                    while remaining or in_flight:
+                        while remaining and len(in_flight) < job.max_workers:
+                            file_path = remaining.popleft()
+                            try:
+                                future = executor.submit(_process_file_worker, file_path)
+                            except BrokenProcessPool:
+                                remaining.appendleft(file_path)
+                                raise
+                            in_flight[future] = file_path
+                        
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        pool_broken = False
+                        for future in done:
+                            if isinstance(future.exception(), BrokenProcessPool):
+                                # Leave the file in flight so it is retried as a suspect
+                                pool_broken = True
+                                continue
+                            result, raised = self._collect_worker_result(future, in_flight.pop(future))
+                            results.append(result)
+                            progress_tracker.update(result.success)
+                            if raised and not job.continue_on_error:
+                                return results
+                        if pool_broken:
+                            raise BrokenProcessPool("A worker process terminated abruptly")
+                except BrokenProcessPool:
+                    suspects = list(in_flight.values())
+            
+            for file_path in suspects:
+                with ProcessPoolExecutor(max_workers=1, initializer=_init_worker_processor) as executor:
+                    future = executor.submit(_process_file_worker, file_path)
+                    result, raised = self._collect_worker_result(future, file_path)
+                results.append(result)
+                progress_tracker.update(result.success)
+                if raised and not job.continue_on_error:
+                    return results
         
         return results
     
+    @staticmethod
+    def _collect_worker_result(future: Future, file_path: str) -> Tuple[ProcessingResult, bool]:
+        """Return a worker task's result, or a failed result and True if the task raised."""
+        try:
+            return future.result(), False
+        except Exception as e:
+            error_result = ProcessingResult(
+                file_path=file_path,
+                success=False,
+                error_message=str(e)
+            )
+            return error_result, True
+    
     def _process_single_file(self, file_path: str) -> ProcessingResult:
         """Process a single SPL file."""
         start_time = time.time()
@@ -290,7 +368,8 @@ class BatchProcessor:
                 error_message=str(e)
             )
     
-    def _save_batch_results(self, batch_result: BatchResult, output_directory: str):
+    def _save_batch_results(self, batch_result: BatchResult, output_directory: str,
+                            one_file_per_doc: bool = False):
         """Save batch results to files."""
         output_path = Path(output_directory)
         output_path.mkdir(parents=True, exist_ok=True)
@@ -308,34 +387,60 @@ class BatchProcessor:
             'completed_at': batch_result.completed_at.isoformat()
         }
         
-        with open(summary_file, 'w') as f:
-            json.dump(summary_data, f, indent=2)
+        with open(summary_file, 'wb') as f:
+            f.write(orjson.dumps(summary_data, option=orjson.OPT_INDENT_2))
         
         # Save detailed results
         results_file = output_path / f"{batch_result.job_id}_results.jsonl"
-        with open(results_file, 'w') as f:
+        with open(results_file, 'wb') as f:
             for result in batch_result.results:
-                result_data = asdict(result)
-                # Remove document object for serialization
-                result_data.pop('document', None)
-                f.write(json.dumps(result_data) + '\n')
+                # Pick fields directly; asdict would deep-copy the whole document only to drop it
+                result_data = {
+                    'file_path': result.file_path,
+                    'success': result.success,
+                    'document_id': result.document_id,
+                    'processing_time': result.processing_time,
+                    'error_message': result.error_message,
+                    'warnings': result.warnings
+                }
+                f.write(orjson.dumps(result_data) + b'\n')
         
         # Save successful documents
         if any(r.document for r in batch_result.results if r.success):
-            docs_dir = output_path / f"{batch_result.job_id}_documents"
-            docs_dir.mkdir(exist_ok=True)
-            
-            for result in batch_result.results:
-                if result.success and result.document:
-                    doc_file = docs_dir / f"{result.document.document_id}.json"
-                    with open(doc_file, 'w') as f:
-                        json.dump(result.document.__dict__, f, indent=2, default=str)
+            if one_file_per_doc:
+                docs_dir = output_path / f"{batch_result.job_id}_documents"
+                docs_dir.mkdir(exist_ok=True)
+                
+                for result in batch_result.results:
+                    if result.success and result.document:
+                        doc_file = docs_dir / f"{result.document.document_id}.json"
+                        with open(doc_file, 'wb') as f:
+                            f.write(orjson.dumps(result.document.__dict__, default=str, option=orjson.OPT_INDENT_2))
+            else:
+                # One streamed JSONL file avoids an open/close per document
+                docs_file = output_path / f"{batch_result.job_id}_documents.jsonl"
+                with open(docs_file, 'wb', buffering=1 << 20) as f:
+                    for result in batch_result.results:
+                        if result.success and result.document:
+                            f.write(orjson.dumps(result.document.__dict__, default=str) + b'\n')
     
     def create_job_from_directory(self, directory: str, pattern: str = "*.xml", 
                                 job_id: Optional[str] = None) -> BatchJob:
         """Create a batch job from files in a directory."""
         directory_path = Path(directory)
-        file_paths = list(str(p) for p in directory_path.glob(pattern))
+        if '**' in pattern or os.sep in pattern or (os.altsep and os.altsep in pattern):
+            # Recursive or nested patterns still need pathlib's globbing
+            file_paths = list(str(p) for p in directory_path.glob(pattern))
+        else:
+            # A single scandir pass avoids building a Path per directory entry
+            try:
+                with os.scandir(str(directory_path)) as entries:
+                    file_paths = [
+                        entry.path for entry in entries
+                        if fnmatch.fnmatch(entry.name, pattern) and entry.is_file()
+                    ]
+            except (FileNotFoundError, NotADirectoryError):
+                file_paths = []
         
         if not file_paths:
             raise ValueError(f"No files found matching pattern '{pattern}' in {directory}")
@@ -382,9 +487,19 @@ class BatchProcessor:
             self.results_cache.clear()
 
 
+# Per-process BatchProcessor, built once by the pool initializer
+_WORKER_PROCESSOR: Optional[BatchProcessor] = None
+
+
+def _init_worker_processor() -> None:
+    """Pool initializer - builds the worker's BatchProcessor once per process."""
+    global _WORKER_PROCESSOR
+    _WORKER_PROCESSOR = BatchProcessor()
+
+
 def _process_file_worker(file_path: str) -> ProcessingResult:
     """Worker function for multiprocessing - must be at module level."""
-    processor = BatchProcessor()
+    processor = _WORKER_PROCESSOR or BatchProcessor()
     return processor._process_single_file(file_path)
 
 
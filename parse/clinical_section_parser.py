@@ -3,7 +3,7 @@ Clinical Section Processing Parser.
 Handles text-heavy clinical sections like warnings, indications, and dosage instructions.
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from typing import Optional, List, Dict, Any
 import re
 from html import unescape
@@ -315,7 +315,7 @@ class ClinicalSectionParser(BaseParser):
         
         # Extract description
         text_element = XMLUtils.find_element(obs_media_element, "hl7:text")
-        description = XMLUtils.get_text_content(text_element) if text_element else None
+        description = XMLUtils.get_text_content(text_element) if text_element is not None else None
         
         # Extract value element with media reference
         value_element = XMLUtils.find_element(obs_media_element, "hl7:value")
@@ -3,7 +3,7 @@ Ingredient Processing Parser.
 Handles complex ingredient hierarchies from manufactured products.
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from typing import Optional, List, Dict, Set
 import re
 
@@ -325,24 +325,26 @@ class IngredientParser(BaseParser):
 class SubstanceValidator:
     """Utility for validating substance codes and names."""
     
-    # UNII (FDA Unique Ingredient Identifier) pattern: 10 characters, alphanumeric
-    UNII_PATTERN = re.compile(r'^[A-Z0-9]{10}$')
+    # UNII (FDA Unique Ingredient Identifier) format: 10 characters, ASCII alphanumeric
+    UNII_LENGTH = 10
     
     @classmethod
     def is_valid_unii(cls, unii_code: str) -> bool:
         """Check if UNII code format is valid."""
-        if not unii_code:
-            return False
-        return bool(cls.UNII_PATTERN.match(unii_code.upper().strip()))
+        return cls.normalize_unii(unii_code) is not None
     
     @classmethod
     def normalize_unii(cls, unii_code: str) -> Optional[str]:
-        """Normalize UNII code to standard format."""
+        """Normalize UNII code to standard format, or None if the format is invalid."""
         if not unii_code:
             return None
         
+        # Clean and check once; is_valid_unii delegates here. After upper() an
+        # ASCII alphanumeric string is exactly [A-Z0-9], so no regex is needed
         normalized = unii_code.upper().strip()
-        return normalized if cls.is_valid_unii(normalized) else None
+        if len(normalized) == cls.UNII_LENGTH and normalized.isascii() and normalized.isalnum():
+            return normalized
+        return None
     
     @classmethod
     def validate_substance_name(cls, name: str) -> bool:
@@ -3,7 +3,7 @@ Product Information Extraction Parser.
 Handles manufactured product details from SPL listing sections (LOINC 48780-1).
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from typing import Optional, List
 import re
 
@@ -90,7 +90,7 @@ class ProductParser(BaseParser):
         
         # Extract suffix if present
         suffix_element = XMLUtils.find_element(name_element, "hl7:suffix")
-        suffix_text = XMLUtils.get_text_content(suffix_element) if suffix_element else None
+        suffix_text = XMLUtils.get_text_content(suffix_element) if suffix_element is not None else None
         
         # Extract main name text (excluding suffix content)
         if name_element.text:
@@ -122,7 +122,7 @@ class ProductParser(BaseParser):
             return None
         
         name_element = XMLUtils.find_element(generic_medicine, "hl7:name")
-        return XMLUtils.get_text_content(name_element) if name_element else None
+        return XMLUtils.get_text_content(name_element) if name_element is not None else None
     
     def _extract_package_info(self, product_element: ET.Element) -> Optional[PackageInfo]:
         """Extract packaging information."""
@@ -3,7 +3,7 @@ Section Parser - Enhanced section parsing with routing to specialized parsers.
 Coordinates section discovery, type identification, and routing.
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from typing import Optional, List, Dict, Type
 from enum import Enum
 
@@ -3,7 +3,7 @@ Core SPL Document Parser - Main orchestrator for SPL XML parsing.
 Extracts document metadata and coordinates specialized parsers.
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from typing import Optional, List, Union
 from datetime import datetime
 import logging
@@ -11,7 +11,7 @@ import importlib
 import json
 from dataclasses import asdict
 
-from .base_parser import BaseParser, XMLUtils, DocumentAuthorParser, ParseError
+from .base_parser import BaseParser, XMLUtils, DocumentAuthorParser, ParseError, SPL_XML_PARSER
 from .models import SPLDocument, CodedConcept, SPLSection, SectionType
 from .validators import SPLDocumentValidator
 from .section_parser import SectionParser
@@ -48,11 +48,9 @@ class SPLDocumentParser(BaseParser):
         try:
             # Parse XML if string provided
             if isinstance(source, str):
-                root = ET.fromstring(source)
-                raw_xml = source
+                root = ET.fromstring(source.encode('utf-8'), SPL_XML_PARSER)
             else:
                 root = source
-                raw_xml = ET.tostring(root, encoding='unicode')
             
             # Verify this is an SPL document
             if not self._is_spl_document(root):
@@ -60,7 +58,6 @@ class SPLDocumentParser(BaseParser):
             
             # Extract document metadata
             document = self._extract_document_metadata(root)
-            #document.raw_xml = raw_xml
             document.processed_at = datetime.now()
             
             # Parse author information
@@ -249,11 +246,17 @@ class SPLDocumentParser(BaseParser):
     def parse_file(self, file_path: str) -> SPLDocument:
         """Parse an SPL document from a file path."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                xml_content = file.read()
-            return self.parse(xml_content)
+            # Let lxml read the file in chunks instead of holding the whole
+            # decoded text plus its UTF-8 re-encoding in memory
+            with open(file_path, 'rb') as file:
+                root = ET.parse(file, SPL_XML_PARSER).getroot()
+            return self.parse(root)
         except FileNotFoundError:
             raise ParseError(f"SPL file not found: {file_path}")
+        except ET.ParseError as e:
+            error_msg = f"XML parsing error: {str(e)}"
+            self.add_error(error_msg)
+            raise ParseError(f"Failed to parse SPL file {file_path}: {error_msg}") from e
         except UnicodeDecodeError as e:
             raise ParseError(f"Failed to decode SPL file {file_path}: {str(e)}")
         except Exception as e:
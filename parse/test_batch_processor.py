@@ -0,0 +1,74 @@
+"""
+Regression tests for multiprocessing batch processing.
+Checks that a worker process dying mid-batch fails only the file it was processing.
+"""
+
+import sys
+import os
+import importlib
+
+PARSE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PARSE_DIR)
+sys.path.insert(0, os.path.dirname(PARSE_DIR))
+
+# batch_processor imports these as top-level modules while they use package-relative
+# imports themselves, so point the top-level names at the package modules first
+for module_name in ("models", "spl_document_parser", "parser_factory"):
+    if module_name not in sys.modules:
+        sys.modules[module_name] = importlib.import_module(f"parse.{module_name}")
+
+import parse.batch_processor as batch_processor
+from parse.batch_processor import BatchProcessor, BatchJob, ProcessingResult
+
+
+CRASH_FILE = "file_06_crash.xml"
+
+
+def _crashing_worker(file_path: str) -> ProcessingResult:
+    """Stand-in worker that kills its process on one file, like a segfaulting parser."""
+    if file_path.endswith(CRASH_FILE):
+        os._exit(1)
+    return ProcessingResult(file_path=file_path, success=True)
+
+
+def _run_crashing_batch(file_count: int):
+    """Run a multiprocessing batch where one file kills its worker."""
+    file_paths = [f"file_{i:02d}.xml" for i in range(file_count)]
+    file_paths[6] = CRASH_FILE
+    
+    batch_job = BatchJob(
+        job_id="test_crashed_worker",
+        file_paths=file_paths,
+        max_workers=2,
+        use_multiprocessing=True,
+        save_results=False
+    )
+    
+    original_worker = batch_processor._process_file_worker
+    batch_processor._process_file_worker = _crashing_worker
+    try:
+        return file_paths, BatchProcessor().process_batch(batch_job)
+    finally:
+        batch_processor._process_file_worker = original_worker
+
+
+def test_crashed_worker():
+    """Test that a crashed worker fails its own file and no other."""
+    print("Testing crashed worker in multiprocessing batch...")
+    
+    for file_count in (13, 40):
+        file_paths, result = _run_crashing_batch(file_count)
+        processed = sorted(r.file_path for r in result.results)
+        failed = {r.file_path for r in result.results if not r.success}
+        
+        print(f"  - {file_count} files: {result.successful} successful, {result.failed} failed")
+        
+        assert processed == sorted(file_paths), "Expected exactly one result per file"
+        assert failed == {CRASH_FILE}, f"Expected only {CRASH_FILE} to fail, got {sorted(failed)}"
+        assert result.successful == file_count - 1
+    
+    print("[OK] Only the crashed file was reported as failed")
+
+
+if __name__ == "__main__":
+    test_crashed_worker()
@@ -32,7 +32,7 @@ def main():
     parser.add_argument('--metadata-file', type=Path, default=Path('data/metadata/downloads.json'),
                        help='File to store download metadata')
     parser.add_argument('--force', action='store_true',
-                       help='Force re-download of existing files')
+                       help='Re-check existing files against DailyMed and re-download changed ones')
     parser.add_argument('--max-concurrent', type=int, default=3,
                        help='Maximum concurrent downloads')
     parser.add_argument('--timeout', type=int, default=300,
@@ -43,6 +43,8 @@ def main():
                        help='Enable verbose logging')
     parser.add_argument('--dry-run', action='store_true',
                        help='Discover files but do not download')
+    parser.add_argument('--no-progress', action='store_true',
+                       help='Disable download progress bars (for headless runs)')
     
     args = parser.parse_args()
     
@@ -58,49 +60,53 @@ def main():
         config = IngestionConfig(
             download_dir=args.download_dir,
             max_concurrent_downloads=args.max_concurrent,
-            timeout=args.timeout
+            timeout=args.timeout,
+            show_progress=not args.no_progress
         )
         
         # Create downloader and tracker
-        downloader = DailyMedDownloader(config)
-        tracker = VersionTracker(args.metadata_file)
+        tracker = VersionTracker(args.metadata_file, autosave=False)
+        downloader = DailyMedDownloader(config, tracker=tracker)
         
-        # Clean up metadata for missing files
-        tracker.cleanup_missing_files()
-        
-        if args.dry_run:
-            logger.info("Running in dry-run mode - discovering files only")
-            bulk_files = downloader.discover_bulk_files()
-            
-            print(f"\nDiscovered {len(bulk_files)} SPL bulk files:")
-            for i, bulk_file in enumerate(bulk_files, 1):
-                print(f"{i:3}. {bulk_file.filename}")
-                if bulk_file.size:
-                    print(f"     Size: {bulk_file.size:,} bytes")
-                if bulk_file.last_modified:
-                    print(f"     Modified: {bulk_file.last_modified}")
-            
-            # Show current stats
-            stats = tracker.get_stats()
-            print(f"\nCurrent tracking stats:")
-            print(f"  Files tracked: {stats['total_files']}")
-            print(f"  Total size: {stats['total_size']:,} bytes")
-            print(f"  Latest download: {stats['latest_download']}")
-            
-        else:
-            # Download all files
-            logger.info(f"Downloading files to: {config.download_dir}")
-            downloaded = downloader.download_all(force=args.force)
-            
-            # Record downloads in tracker
-            for metadata in downloaded:
-                tracker.record_download(metadata)
+        # Metadata changes are written once when the tracker context exits, and
+        # the downloader's HTTP connections are closed along with it
+        with tracker, downloader:
+            # Clean up metadata for missing files
+            tracker.cleanup_missing_files()
             
-            # Show final stats
-            stats = tracker.get_stats()
-            logger.info(f"Ingestion complete. Downloaded {len(downloaded)} files")
-            logger.info(f"Total files tracked: {stats['total_files']}")
-            logger.info(f"Total size: {stats['total_size']:,} bytes")
+            if args.dry_run:
+                logger.info("Running in dry-run mode - discovering files only")
+                bulk_files = downloader.discover_bulk_files()
+                
+                print(f"\nDiscovered {len(bulk_files)} SPL bulk files:")
+                for i, bulk_file in enumerate(bulk_files, 1):
+                    print(f"{i:3}. {bulk_file.filename}")
+                    if bulk_file.size:
+                        print(f"     Size: {bulk_file.size:,} bytes")
+                    if bulk_file.last_modified:
+                        print(f"     Modified: {bulk_file.last_modified}")
+                
+                # Show current stats
+                stats = tracker.get_stats()
+                print(f"\nCurrent tracking stats:")
+                print(f"  Files tracked: {stats['total_files']}")
+                print(f"  Total size: {stats['total_size']:,} bytes")
+                print(f"  Latest download: {stats['latest_download']}")
+                
+            else:
+                # Download all files
+                logger.info(f"Downloading files to: {config.download_dir}")
+                downloaded = downloader.download_all(force=args.force)
+                
+                # Record downloads in tracker
+                for metadata in downloaded:
+                    tracker.record_download(metadata)
+                
+                # Show final stats
+                stats = tracker.get_stats()
+                logger.info(f"Ingestion complete. Downloaded {len(downloaded)} files")
+                logger.info(f"Total files tracked: {stats['total_files']}")
+                logger.info(f"Total size: {stats['total_size']:,} bytes")
         
     except KeyboardInterrupt:
         logger.info("Ingestion interrupted by user")